@@ -11,26 +11,56 @@ Usage :
     python rss_to_ods.py --from 25/04/2025 --to 14/02/2026 -o rattrapage.ods
 """
 
+from __future__ import annotations
+
 import argparse
+import io
 import re
 import sys
+import threading
 import time
+import zipfile
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from functools import lru_cache
 from html import unescape
+from itertools import chain
 from pathlib import Path
+from typing import TYPE_CHECKING
 from urllib.parse import urlparse, parse_qs, urlencode
+from xml.sax.saxutils import escape
 
-import feedparser
-from odf.opendocument import OpenDocumentSpreadsheet
-from odf.style import Style, TableCellProperties, TableColumnProperties, TextProperties
-from odf.table import Table, TableCell, TableColumn, TableRow
-from odf.text import P
+# requests, lxml et odfpy sont importés dans les fonctions qui les utilisent :
+# --help et les petits exports ne paient pas leur temps de chargement.
+if TYPE_CHECKING:
+    import requests
 
 # ── Configuration par défaut ──────────────────────────────────────────────────
 DEFAULT_FEED_URL = "https://www.uneiaparjour.fr/feed/"
 DEFAULT_OUTPUT = "uneiaparjour.ods"
 MAX_CATEGORIES = 6
 DELAY_BETWEEN_PAGES = 1  # secondes entre chaque requête (politesse)
+PARALLEL_PAGES = 4  # pages récupérées simultanément
+REQUEST_TIMEOUT = 15  # secondes
+USER_AGENT = "rss_to_ods.py"
+MAX_RETRIES = 3  # nouvelles tentatives sur 429/503 avec Retry-After
+MAX_RETRY_AFTER = 60  # secondes d'attente maximum par tentative
+CACHE_NAME = ".rss_cache"  # cache HTTP SQLite (.rss_cache.sqlite)
+CONTENT_ENCODED = "{http://purl.org/rss/1.0/modules/content/}encoded"
+
+ODS_MANIFEST = (
+    b'<?xml version="1.0" encoding="UTF-8"?>'
+    b'<manifest:manifest xmlns:manifest="urn:oasis:names:tc:opendocument:xmlns:manifest:1.0">'
+    b'<manifest:file-entry manifest:full-path="/" '
+    b'manifest:media-type="application/vnd.oasis.opendocument.spreadsheet"/>'
+    b'<manifest:file-entry manifest:full-path="styles.xml" manifest:media-type="text/xml"/>'
+    b'<manifest:file-entry manifest:full-path="content.xml" manifest:media-type="text/xml"/>'
+    b'<manifest:file-entry manifest:full-path="meta.xml" manifest:media-type="text/xml"/>'
+    b'</manifest:manifest>'
+)
 
 COLUMNS = [
     ("Titre", 8),
@@ -47,12 +77,13 @@ COLUMNS = [
 
 
 # ── Helpers ───────────────────────────────────────────────────────────────────
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
 def strip_html(html_text: str) -> str:
-    """Supprime les balises HTML et décode les entités."""
-    text = re.sub(r"<[^>]+>", "", html_text)
-    text = unescape(text)
-    text = re.sub(r"\s+", " ", text)
-    return text.strip()
+    """Supprime les balises HTML, décode les entités et normalise les espaces."""
+    # split()/join() fusionne les espaces et retire ceux des bords en une passe
+    return " ".join(unescape(_TAG_RE.sub("", html_text)).split())
 
 
 def extract_first_paragraph(entry: dict) -> str:
@@ -60,15 +91,8 @@ def extract_first_paragraph(entry: dict) -> str:
     Extrait le premier paragraphe de content:encoded (texte complet),
     avec fallback sur la description tronquée du RSS.
     """
-    content = ""
-
-    # feedparser stocke content:encoded dans entry.content
-    if hasattr(entry, "content") and entry.content:
-        content = entry.content[0].get("value", "")
-
     # Fallback sur description si content:encoded absent
-    if not content:
-        content = entry.get("description", "") or entry.get("summary", "")
+    content = entry["content"] or entry["description"]
 
     # Extraire le premier <p>...</p> non vide
     matches = re.findall(r"<p[^>]*>(.*?)</p>", content, re.DOTALL | re.IGNORECASE)
@@ -81,21 +105,26 @@ def extract_first_paragraph(entry: dict) -> str:
     return strip_html(content)
 
 
-def format_date(date_str: str) -> str:
-    """Convertit une date RSS en format lisible JJ/MM/AAAA."""
+@lru_cache(maxsize=4096)
+def _parse_rfc822(date_str: str) -> datetime | None:
+    """Parse une date RSS (RFC 822), mise en cache par chaîne."""
     try:
-        dt = datetime.strptime(date_str, "%a, %d %b %Y %H:%M:%S %z")
-        return dt.strftime("%d/%m/%Y")
+        dt = parsedate_to_datetime(date_str)
     except (ValueError, TypeError):
-        return date_str or ""
+        return None
+    # « -0000 » donne une date naïve : on la considère en UTC
+    return dt if dt.tzinfo else dt.replace(tzinfo=timezone.utc)
+
+
+def format_date(date_str: str) -> str:
+    """Convertit une date RSS en format lisible JJ/MM/AAAA."""
+    dt = _parse_rfc822(date_str)
+    return dt.strftime("%d/%m/%Y") if dt else date_str or ""
 
 
 def parse_pub_date(date_str: str) -> datetime | None:
     """Parse une date RSS en objet datetime pour comparaison."""
-    try:
-        return datetime.strptime(date_str, "%a, %d %b %Y %H:%M:%S %z")
-    except (ValueError, TypeError):
-        return None
+    return _parse_rfc822(date_str)
 
 
 def parse_user_date(date_str: str) -> datetime:
@@ -112,8 +141,13 @@ def parse_user_date(date_str: str) -> datetime:
     )
 
 
+@lru_cache(maxsize=256)
 def build_paged_url(base_url: str, page: int) -> str:
     """Construit l'URL paginée pour un flux WordPress."""
+    # Cas courant (…/feed/ sans paramètres) : simple concaténation
+    if "?" not in base_url and "#" not in base_url:
+        return f"{base_url}?paged={page}"
+
     parsed = urlparse(base_url)
     params = parse_qs(parsed.query)
     params["paged"] = [str(page)]
@@ -121,119 +155,427 @@ def build_paged_url(base_url: str, page: int) -> str:
     return parsed._replace(query=new_query).geturl()
 
 
+def parse_item(item) -> dict:
+    """Extrait d'un élément <item> les seuls champs utilisés pour l'export."""
+    categories = ((c.text or "").strip() for c in item.iterfind("category"))
+    return {
+        "title": item.findtext("title", "").strip(),
+        "link": item.findtext("link", "").strip(),
+        "published": item.findtext("pubDate", "").strip(),
+        "description": item.findtext("description", ""),
+        "content": item.findtext(CONTENT_ENCODED, ""),
+        "categories": [c for c in categories if c],
+    }
+
+
+def iter_items(content: bytes):
+    """
+    Parcourt les <item> du flux un par un (iterparse) : chaque élément est
+    libéré après lecture, la mémoire reste bornée à un article.
+    """
+    from lxml import etree
+
+    for _, item in etree.iterparse(io.BytesIO(content), tag="item", resolve_entities=False):
+        yield parse_item(item)
+        item.clear()
+        while item.getprevious() is not None:
+            del item.getparent()[0]
+
+
+def make_session(workers: int, cache: bool = True) -> requests.Session:
+    """
+    Crée la session HTTP partagée par les workers : un pool de connexions
+    keep-alive par hôte, dimensionné pour que chaque worker garde la sienne.
+    Avec cache, les pages sont conservées sur disque et revalidées à chaque
+    exécution (If-None-Match / If-Modified-Since) : une page inchangée
+    ne coûte qu'une réponse 304. Le Cache-Control du serveur est ignoré :
+    un max-age servirait sinon des pages périmées sans requête.
+    """
+    import requests
+    import requests_cache
+    from requests.adapters import HTTPAdapter
+
+    if cache:
+        session = requests_cache.CachedSession(
+            CACHE_NAME,
+            backend="sqlite",
+            expire_after=requests_cache.EXPIRE_IMMEDIATELY,
+        )
+    else:
+        session = requests.Session()
+    session.headers["User-Agent"] = USER_AGENT
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def _retry_after(resp) -> float | None:
+    """Délai demandé par l'en-tête Retry-After (secondes ou date HTTP), plafonné."""
+    value = resp.headers.get("Retry-After", "").strip()
+    if value.isdigit():
+        wait = float(value)
+    elif dt := _parse_rfc822(value):
+        wait = (dt - datetime.now(timezone.utc)).total_seconds()
+    else:
+        return None
+    return min(max(wait, 0.0), MAX_RETRY_AFTER)
+
+
+class RequestPacer:
+    """
+    Cadence commune aux requêtes simultanées : deux départs sont espacés
+    d'au moins `delay` secondes, quel que soit l'ordre dans lequel les
+    pages se terminent, et un Retry-After reçu par un worker suspend les
+    départs de tous. Horloge : time.monotonic.
+    """
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._next_start = 0.0
+        self._resume_at = 0.0
+
+    def _claim(self) -> float:
+        """Prend le prochain créneau libre ; à appeler sous self._lock."""
+        start = max(time.monotonic(), self._next_start, self._resume_at)
+        self._next_start = start + self.delay
+        return start
+
+    def reserve(self) -> float:
+        """Réserve le prochain créneau de départ libre et retourne son heure."""
+        with self._lock:
+            return self._claim()
+
+    def wait_turn(self, start: float) -> bool:
+        """
+        Attend l'heure de départ `start`. Si une pause Retry-After a recouvert
+        ce créneau entre-temps, un nouveau créneau est réservé après la pause :
+        les requêtes repartent une à une, pas en rafale.
+        Retourne False si la pagination a été arrêtée entre-temps.
+        """
+        while not self._stopped.wait(max(0.0, start - time.monotonic())):
+            with self._lock:
+                if start >= self._resume_at:
+                    return True
+                start = self._claim()
+        return False
+
+    def hold(self, seconds: float) -> None:
+        """Suspend les départs de tous les workers pendant `seconds` secondes."""
+        with self._lock:
+            self._resume_at = max(self._resume_at, time.monotonic() + seconds)
+
+    def stop(self) -> None:
+        """Libère les requêtes encore en attente de leur créneau : elles sont abandonnées."""
+        self._stopped.set()
+
+
+def fetch_page(session: requests.Session, url: str, page: int,
+               pacer: RequestPacer, start: float) -> dict | None:
+    """
+    Télécharge une page du flux à l'heure de départ réservée `start`
+    et en extrait les articles.
+    Retourne un dict {"status", "entries", "error"} ; les erreurs réseau
+    ou XML sont renvoyées dans "error" plutôt que levées.
+    Retourne None si la pagination s'est arrêtée avant son tour.
+    """
+    import requests
+    from lxml import etree
+
+    if not pacer.wait_turn(start):
+        return None
+    print(f"📡 Page {page} : {url}")
+
+    try:
+        for attempt in range(MAX_RETRIES + 1):
+            resp = session.get(url, timeout=REQUEST_TIMEOUT)
+            wait = _retry_after(resp) if resp.status_code in (429, 503) else None
+            if wait is None or attempt == MAX_RETRIES:
+                break
+            print(f"   ⏳ {url} : le serveur demande d'attendre {wait:.0f} s")
+            # La pause vaut pour toutes les requêtes ; la nouvelle tentative
+            # réserve ensuite son créneau comme les autres
+            pacer.hold(wait)
+            if not pacer.wait_turn(pacer.reserve()):
+                return None
+
+        if resp.status_code == 404:
+            return {"status": 404, "entries": [], "error": None}
+        resp.raise_for_status()
+        entries = list(iter_items(resp.content))
+    except (requests.RequestException, etree.XMLSyntaxError) as exc:
+        return {"status": None, "entries": [], "error": exc}
+
+    return {"status": resp.status_code, "entries": entries, "error": None}
+
+
+def _new_entries(feed: dict, page: int, seen_links: set) -> list | None:
+    """
+    Retourne les articles d'une page absents des pages précédentes,
+    ou None quand la pagination doit s'arrêter.
+    """
+    # Détection de fin : erreur réseau ou XML
+    if feed["error"] is not None:
+        if page == 1:
+            print(f"❌ Erreur lors de la récupération : {feed['error']}", file=sys.stderr)
+            sys.exit(1)
+        print(f"   → Fin de la pagination (page {page} inaccessible)")
+        return None
+
+    # Détection de fin : HTTP 404
+    if feed["status"] == 404:
+        print(f"   → Fin de la pagination (404)")
+        return None
+
+    # Détection de fin : page vide
+    if not feed["entries"]:
+        print(f"   → Fin de la pagination (page {page} vide)")
+        return None
+
+    # Flux trié par date décroissante : si l'article le plus ancien de la page
+    # est déjà connu, toute la page l'est aussi
+    if feed["entries"][-1]["link"] in seen_links:
+        print("   → Fin de la pagination (doublons détectés)")
+        return None
+
+    new_entries = []
+    for entry in feed["entries"]:
+        link = entry["link"]
+        if link not in seen_links:
+            seen_links.add(link)
+            new_entries.append(entry)
+
+    # Aucun nouvel article → doublons = fin
+    if not new_entries:
+        print(f"   → Fin de la pagination (doublons détectés)")
+        return None
+
+    return new_entries
+
+
 def fetch_all_entries(url: str, paginate: bool = True, max_items: int | None = None,
-                      delay: float = 1.0) -> list:
+                      delay: float = 1.0, workers: int = PARALLEL_PAGES,
+                      cache: bool = True, date_from: datetime | None = None) -> Iterator[dict]:
     """
     Récupère tous les articles du flux RSS en paginant automatiquement.
     WordPress expose /feed/?paged=1, ?paged=2, etc.
-    La pagination s'arrête quand une page ne retourne aucun article
-    ou retourne une erreur (404).
+    Jusqu'à `workers` pages sont téléchargées simultanément sur une même
+    session HTTP (le temps est dominé par l'attente réseau), puis fusionnées
+    dans l'ordre ; chaque page traitée libère sa place à la suivante, qui se
+    télécharge pendant que les articles déjà reçus sont traités. Les départs
+    de requêtes restent espacés d'au moins `delay` secondes, comme en
+    séquentiel, et un Retry-After (429/503) suspend toutes les requêtes.
+    La pagination s'arrête quand une page ne retourne aucun article,
+    retourne une erreur (404) ou, avec date_from, contient des articles
+    antérieurs à cette date.
+    Générateur : les articles sont transmis page par page, dès leur arrivée.
     """
-    all_entries = []
-    page = 1
+    count = 0
     seen_links = set()
 
-    while True:
-        paged_url = build_paged_url(url, page) if paginate and page > 1 else url
-        print(f"📡 Page {page} : {paged_url}")
+    pacer = RequestPacer(delay)
 
-        feed = feedparser.parse(paged_url)
+    if not paginate:
+        workers = 1
 
-        # Détection de fin : erreur de parsing sans entrées
-        if feed.bozo and not feed.entries:
-            if page == 1:
-                print(f"❌ Erreur lors du parsing : {feed.bozo_exception}", file=sys.stderr)
-                sys.exit(1)
-            else:
-                print(f"   → Fin de la pagination (page {page} inaccessible)")
-                break
+    with make_session(workers, cache) as session, ThreadPoolExecutor(max_workers=workers) as executor:
+        def submit(p: int) -> tuple:
+            paged_url = build_paged_url(url, p) if p > 1 else url
+            return p, executor.submit(fetch_page, session, paged_url, p, pacer, pacer.reserve())
 
-        # Détection de fin : page vide
-        if not feed.entries:
-            print(f"   → Fin de la pagination (page {page} vide)")
-            break
+        # Fenêtre glissante : `workers` pages toujours en cours de téléchargement,
+        # chacune partant au créneau qu'elle a réservé dans la cadence commune
+        pending = deque(submit(p) for p in range(1, workers + 1))
 
-        # Détection de fin : HTTP 404
-        if hasattr(feed, "status") and feed.status == 404:
-            print(f"   → Fin de la pagination (404)")
-            break
+        try:
+            while pending:
+                p, future = pending.popleft()
+                new_entries = _new_entries(future.result(), p, seen_links)
+                if new_entries is None:
+                    break
+
+                if max_items:
+                    new_entries = new_entries[:max_items - count]
+                count += len(new_entries)
+                print(f"   → Page {p} : {len(new_entries)} nouveaux articles (total : {count})")
 
-        new_count = 0
-        for entry in feed.entries:
-            link = entry.get("link", "")
-            if link not in seen_links:
-                seen_links.add(link)
-                all_entries.append(entry)
-                new_count += 1
+                more = paginate
 
-        print(f"   → {new_count} nouveaux articles (total : {len(all_entries)})")
+                # Limite atteinte
+                if max_items and count >= max_items:
+                    print(f"   → Limite de {max_items} articles atteinte")
+                    more = False
 
-        # Aucun nouvel article → doublons = fin
-        if new_count == 0:
-            print(f"   → Fin de la pagination (doublons détectés)")
-            break
+                # Flux trié par date décroissante : une fois date_from dépassée,
+                # les pages suivantes sont entièrement hors de la plage
+                oldest = parse_pub_date(new_entries[-1]["published"])
+                if more and date_from and oldest and oldest < date_from:
+                    print(f"   → Fin de la pagination (articles antérieurs au "
+                          f"{date_from.strftime('%d/%m/%Y')})")
+                    more = False
 
-        # Limite atteinte
-        if max_items and len(all_entries) >= max_items:
-            all_entries = all_entries[:max_items]
-            print(f"   → Limite de {max_items} articles atteinte")
-            break
+                # La page suivante part avant que ces articles soient traités
+                if more:
+                    pending.append(submit(p + workers))
 
-        if not paginate:
-            break
+                yield from new_entries
 
-        page += 1
-        time.sleep(delay)
+                if not more:
+                    break
+        finally:
+            # Les requêtes spéculatives encore en attente de leur créneau sont abandonnées
+            pacer.stop()
 
-    return all_entries
+    print(f"\n📰 Total : {count} articles récupérés")
 
 
-def parse_entries(entries: list, date_from: datetime | None = None,
-                  date_to: datetime | None = None) -> list[dict]:
-    """Transforme les entrées feedparser en lignes structurées, avec filtre par date."""
-    rows = []
+def parse_entries(entries: Iterable[dict], date_from: datetime | None = None,
+                  date_to: datetime | None = None) -> Iterator[dict]:
+    """
+    Transforme les articles du flux en lignes structurées, avec filtre par date.
+    Générateur : chaque ligne est produite dès que son article est reçu.
+    """
     skipped = 0
+
+    # Bornes calculées une seule fois, comparées en secondes epoch
+    filtering = date_from is not None or date_to is not None
+    lo = date_from.timestamp() if date_from else float("-inf")
+    hi = date_to.replace(hour=23, minute=59, second=59).timestamp() if date_to else float("inf")
+
     for entry in entries:
         # Filtrage par date
-        if date_from or date_to:
-            pub = parse_pub_date(entry.get("published", ""))
-            if pub:
-                if date_from and pub < date_from:
-                    skipped += 1
-                    continue
-                if date_to and pub > date_to.replace(hour=23, minute=59, second=59):
-                    skipped += 1
-                    continue
-
-        categories = [tag.term for tag in getattr(entry, "tags", [])]
+        if filtering:
+            pub = parse_pub_date(entry["published"])
+            if pub and not lo <= pub.timestamp() <= hi:
+                skipped += 1
+                continue
+
+        categories = entry["categories"]
 
         # Exclure les articles de la catégorie "Focus Lettre"
         if any(c.lower() in ("focus lettre", "focus-lettre") for c in categories):
             skipped += 1
             continue
 
-        cats = (categories + [""] * MAX_CATEGORIES)[:MAX_CATEGORIES]
+        # Pas de remplissage : les colonnes vides sont générées par le
+        # gabarit de ligne correspondant au nombre de catégories
+        cats = categories[:MAX_CATEGORIES]
 
-        rows.append({
-            "titre": entry.get("title", ""),
+        yield {
+            "titre": entry["title"],
             "description": extract_first_paragraph(entry),
-            "url": entry.get("link", ""),
+            "url": entry["link"],
             "categories": cats,
-            "date": format_date(entry.get("published", "")),
-        })
+            "date": format_date(entry["published"]),
+        }
 
     if skipped:
         print(f"📅 {skipped} articles hors de la plage de dates ou exclus (ignorés)")
 
-    return rows
-
 
 # ── Génération ODS ────────────────────────────────────────────────────────────
-def create_ods(rows: list[dict], output_path: str) -> None:
+def _cell_xml(value: str, style_name: str) -> str:
+    """Sérialise une cellule texte au format content.xml."""
+    return (f'<table:table-cell table:style-name="{style_name}">'
+            f'<text:p>{escape(value)}</text:p></table:table-cell>')
+
+
+def _utf8(xml: str | bytes) -> bytes:
+    """odfpy renvoie selon les parties du str ou des bytes."""
+    return xml if isinstance(xml, bytes) else xml.encode("utf-8")
+
+
+def _row_template(cs: str, ccs: str, n_cats: int) -> str:
+    """
+    Gabarit %-format d'une ligne de données à n_cats catégories, noms de
+    styles déjà insérés. Les colonnes de catégorie restantes forment une
+    seule cellule vide répétée (table:number-columns-repeated).
+    """
+    n_empty = MAX_CATEGORIES - n_cats
+    empty = (f'<table:table-cell table:style-name="{ccs}" '
+             f'table:number-columns-repeated="{n_empty}"/>') if n_empty else ""
+    return ("<table:table-row>"
+            + _cell_xml("%s", cs) * 3
+            + _cell_xml("%s", ccs) * n_cats
+            + empty
+            + _cell_xml("%s", cs)
+            + "</table:table-row>")
+
+
+def _rows_xml(rows: Iterable[dict], odd: tuple[str, str],
+              even: tuple[str, str]) -> Iterator[str]:
+    """Sérialise les lignes de données en XML, une ligne à la fois."""
+    # Un gabarit par parité de ligne et par nombre de catégories renseignées
+    templates = (
+        [_row_template(*odd, n) for n in range(MAX_CATEGORIES + 1)],
+        [_row_template(*even, n) for n in range(MAX_CATEGORIES + 1)],
+    )
+
+    for idx, row in enumerate(rows):
+        cats = row["categories"]
+        yield templates[idx & 1][len(cats)] % (
+            escape(row["titre"]),
+            escape(row["description"]),
+            escape(row["url"]),
+            *map(escape, cats),
+            escape(row["date"]),
+        )
+
+
+def _write_ods(doc, output_path: str, rows_xml: Iterable[str]) -> int:
+    """
+    Écrit l'archive ODS directement : mimetype non compressé en premier
+    (exigence ODF), puis les parties XML en DEFLATE rapide. Les lignes de
+    données sont écrites en flux à la fin de la table de content.xml.
+    L'archive est construite dans un fichier temporaire, renommé une fois
+    complet. Retourne le nombre de lignes écrites.
+    """
+    head, tail = _utf8(doc.contentxml()).split(b"</table:table>", 1)
+    tmp_path = Path(f"{output_path}.tmp")
+    count = 0
+
+    try:
+        with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED, compresslevel=1) as z:
+            z.writestr("mimetype", doc.mimetype.encode("utf-8"),
+                       compress_type=zipfile.ZIP_STORED)
+            z.writestr("styles.xml", _utf8(doc.stylesxml()))
+            # Un ZipInfo explicite donne à content.xml la date courante, comme
+            # les entrées ajoutées par writestr (sinon : 1980-01-01).
+            info = zipfile.ZipInfo("content.xml", time.localtime()[:6])
+            info.compress_type = zipfile.ZIP_DEFLATED
+            info._compresslevel = z.compresslevel
+            with z.open(info, "w") as f:
+                f.write(head)
+                for row_xml in rows_xml:
+                    f.write(row_xml.encode("utf-8"))
+                    count += 1
+                f.write(b"</table:table>")
+                f.write(tail)
+            z.writestr("meta.xml", _utf8(doc.metaxml()))
+            z.writestr("META-INF/manifest.xml", ODS_MANIFEST)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    tmp_path.replace(output_path)
+    return count
+
+
+def create_ods(rows: Iterable[dict], output_path: str) -> None:
     """Crée le fichier ODS avec mise en forme professionnelle."""
+    from odf.opendocument import OpenDocumentSpreadsheet
+    from odf.style import Style, TableCellProperties, TableColumnProperties, TextProperties
+    from odf.table import Table, TableCell, TableColumn, TableRow
+    from odf.text import P
+
     doc = OpenDocumentSpreadsheet()
 
     # — Styles —
+    # Les styles des lignes de données sont des styles communs (styles.xml) :
+    # ces lignes sont écrites en XML brut, et odfpy n'écrit dans content.xml
+    # que les styles automatiques utilisés par des éléments de son DOM.
     header_style = Style(name="HeaderCell", family="table-cell")
     header_style.addElement(TableCellProperties(
         backgroundcolor="#2C3E50", padding="0.15cm"
@@ -248,7 +590,7 @@ def create_ods(rows: list[dict], output_path: str) -> None:
         padding="0.1cm", borderbottom="0.5pt solid #DEE2E6"
     ))
     cell_style.addElement(TextProperties(fontsize="10pt", fontfamily="Arial"))
-    doc.automaticstyles.addElement(cell_style)
+    doc.styles.addElement(cell_style)
 
     cat_style = Style(name="CatCell", family="table-cell")
     cat_style.addElement(TableCellProperties(
@@ -256,7 +598,7 @@ def create_ods(rows: list[dict], output_path: str) -> None:
         borderbottom="0.5pt solid #DEE2E6"
     ))
     cat_style.addElement(TextProperties(fontsize="10pt", fontfamily="Arial"))
-    doc.automaticstyles.addElement(cat_style)
+    doc.styles.addElement(cat_style)
 
     even_style = Style(name="EvenCell", family="table-cell")
     even_style.addElement(TableCellProperties(
@@ -264,7 +606,7 @@ def create_ods(rows: list[dict], output_path: str) -> None:
         borderbottom="0.5pt solid #DEE2E6"
     ))
     even_style.addElement(TextProperties(fontsize="10pt", fontfamily="Arial"))
-    doc.automaticstyles.addElement(even_style)
+    doc.styles.addElement(even_style)
 
     even_cat_style = Style(name="EvenCatCell", family="table-cell")
     even_cat_style.addElement(TableCellProperties(
@@ -272,7 +614,7 @@ def create_ods(rows: list[dict], output_path: str) -> None:
         borderbottom="0.5pt solid #DEE2E6"
     ))
     even_cat_style.addElement(TextProperties(fontsize="10pt", fontfamily="Arial"))
-    doc.automaticstyles.addElement(even_cat_style)
+    doc.styles.addElement(even_cat_style)
 
     col_styles = []
     for i, (_, width_cm) in enumerate(COLUMNS):
@@ -295,39 +637,17 @@ def create_ods(rows: list[dict], output_path: str) -> None:
         header_row.addElement(cell)
     table.addElement(header_row)
 
-    # Données
-    for idx, row in enumerate(rows):
-        tr = TableRow()
-        is_even = idx % 2 == 1
-        cs = even_style if is_even else cell_style
-        ccs = even_cat_style if is_even else cat_style
-
-        for value, style in [
-            (row["titre"], cs),
-            (row["description"], cs),
-            (row["url"], cs),
-        ]:
-            tc = TableCell(stylename=style)
-            tc.addElement(P(text=value))
-            tr.addElement(tc)
-
-        for cat in row["categories"]:
-            tc = TableCell(stylename=ccs)
-            tc.addElement(P(text=cat))
-            tr.addElement(tc)
-
-        tc = TableCell(stylename=cs)
-        tc.addElement(P(text=row["date"]))
-        tr.addElement(tc)
-
-        table.addElement(tr)
-
     doc.spreadsheet.addElement(table)
 
+    # Données : sérialisées directement en XML, sans passer par le DOM odfpy,
+    # et écrites au fil de l'eau pendant la récupération du flux
+    odd = (cell_style.getAttribute("name"), cat_style.getAttribute("name"))
+    even = (even_style.getAttribute("name"), even_cat_style.getAttribute("name"))
+
     Path(output_path).parent.mkdir(parents=True, exist_ok=True)
-    doc.save(output_path)
+    count = _write_ods(doc, output_path, _rows_xml(rows, odd, even))
     print(f"\n✅ Fichier généré : {output_path}")
-    print(f"   📊 {len(rows)} articles — 10 colonnes — {MAX_CATEGORIES} catégories max")
+    print(f"   📊 {count} articles — 10 colonnes — {MAX_CATEGORIES} catégories max")
 
 
 # ── CLI ───────────────────────────────────────────────────────────────────────
@@ -362,6 +682,17 @@ def main():
         default=DELAY_BETWEEN_PAGES,
         help=f"Délai entre les pages en secondes (défaut : {DELAY_BETWEEN_PAGES})"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=PARALLEL_PAGES,
+        help=f"Nombre de pages récupérées en parallèle (défaut : {PARALLEL_PAGES})"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"Ne pas utiliser le cache HTTP sur disque ({CACHE_NAME}.sqlite)"
+    )
     parser.add_argument(
         "--from", dest="date_from",
         type=str, default=None,
@@ -392,15 +723,19 @@ def main():
         paginate=not args.no_paginate,
         max_items=args.max,
         delay=args.delay,
+        workers=max(1, args.workers),
+        cache=not args.no_cache,
+        date_from=date_from,
     )
 
-    if not entries:
+    # Le premier article est attendu avant de créer le fichier : un flux vide
+    # ou inaccessible s'arrête sans laisser d'ODS derrière lui
+    first = next(entries, None)
+    if first is None:
         print("⚠️  Aucun article trouvé dans le flux.", file=sys.stderr)
         sys.exit(1)
 
-    print(f"\n📰 Total : {len(entries)} articles récupérés")
-
-    rows = parse_entries(entries, date_from=date_from, date_to=date_to)
+    rows = parse_entries(chain([first], entries), date_from=date_from, date_to=date_to)
     create_ods(rows, args.output)
 
 